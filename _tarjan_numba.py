@@ -0,0 +1,128 @@
+from array import array
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the kernel also runs as plain Python
+    def njit(*args, **kwargs):
+        return lambda function: function
+
+
+@njit(cache=True)
+def _tarjan_kernel(indptr, indices, vertices, index, lowlink, on_stack, scc_id,
+                   call_stack, offsets, scc_stack):
+    """
+    Label every vertex with its strongly connected component using an
+    iterative Tarjan search over CSR arrays.
+
+    All working storage is preallocated by the caller, so the kernel only
+    reads and writes integer buffers. Each open frame keeps its next
+    offset into indices, so no neighbor is scanned twice.
+
+    Args:
+        indptr (array): CSR row offsets, of size vertices + 1.
+        indices (array): CSR neighbor vertices.
+        vertices (int): The number of vertices.
+        index (array): Discovery order of each vertex, filled with -1.
+        lowlink (array): Smallest index reachable from each vertex.
+        on_stack (array): Whether each vertex is on the component stack.
+        scc_id (array): Receives the SCC index of each vertex.
+        call_stack (array): Vertices of the open frames.
+        offsets (array): Next neighbor offset of each open frame.
+        scc_stack (array): Vertices of the SCCs currently being built.
+
+    Returns:
+        int: The number of strongly connected components.
+    """
+    counter = 0
+    num_sccs = 0
+
+    for root in range(vertices):
+        if index[root] != -1:
+            continue
+
+        index[root] = counter
+        lowlink[root] = counter
+        counter += 1
+        scc_top = 0
+        scc_stack[scc_top] = root
+        scc_top += 1
+        on_stack[root] = 1
+        call_stack[0] = root
+        offsets[0] = indptr[root]
+        depth = 1
+
+        while depth > 0:
+            vertex = call_stack[depth - 1]
+            j = offsets[depth - 1]
+            end = indptr[vertex + 1]
+            descended = False
+            while j < end:
+                neighbor = indices[j]
+                j += 1
+                if index[neighbor] == -1:
+                    # Descend into the unvisited neighbor
+                    offsets[depth - 1] = j
+                    index[neighbor] = counter
+                    lowlink[neighbor] = counter
+                    counter += 1
+                    scc_stack[scc_top] = neighbor
+                    scc_top += 1
+                    on_stack[neighbor] = 1
+                    call_stack[depth] = neighbor
+                    offsets[depth] = indptr[neighbor]
+                    depth += 1
+                    descended = True
+                    break
+                if on_stack[neighbor] and index[neighbor] < lowlink[vertex]:
+                    lowlink[vertex] = index[neighbor]
+            if descended:
+                continue
+
+            # All neighbors processed: pop the frame
+            depth -= 1
+            if depth > 0:
+                parent = call_stack[depth - 1]
+                if lowlink[vertex] < lowlink[parent]:
+                    lowlink[parent] = lowlink[vertex]
+
+            # Vertex is the root of an SCC
+            if lowlink[vertex] == index[vertex]:
+                while True:
+                    scc_top -= 1
+                    member = scc_stack[scc_top]
+                    on_stack[member] = 0
+                    scc_id[member] = num_sccs
+                    if member == vertex:
+                        break
+                num_sccs += 1
+
+    # Tarjan emits SCCs in reverse topological order; renumber them topologically
+    for v in range(vertices):
+        scc_id[v] = num_sccs - 1 - scc_id[v]
+
+    return num_sccs
+
+
+def tarjan_scc(indptr, indices, vertices):
+    """
+    Find the strongly connected components of a graph stored as CSR arrays.
+
+    Args:
+        indptr (array): CSR row offsets, of size vertices + 1.
+        indices (array): CSR neighbor vertices.
+        vertices (int): The number of vertices.
+
+    Returns:
+        tuple: The SCC index of every vertex as an int array, numbered in
+               topological order, and the number of SCCs.
+    """
+    index = array('i', [-1] * vertices)
+    lowlink = array('i', [0] * vertices)
+    on_stack = bytearray(vertices)
+    scc_id = array('i', [0] * vertices)
+    call_stack = array('i', [0] * vertices)
+    offsets = array('i', [0] * vertices)
+    scc_stack = array('i', [0] * vertices)
+    num_sccs = _tarjan_kernel(indptr, indices, vertices, index, lowlink, on_stack,
+                              scc_id, call_stack, offsets, scc_stack)
+    return scc_id, num_sccs
@@ -1,4 +1,9 @@
+from array import array
 from collections import defaultdict
+from itertools import accumulate, chain, repeat
+from operator import and_, index, sub
+
+from _tarjan_numba import tarjan_scc
 
 
 class Graph:
@@ -12,7 +17,12 @@ class Graph:
         """
         self.airports = airports  # Dictionary of airports
         self.vertices = len(airports)  # Automatically handle the number of vertices
-        self.graph = defaultdict(list)  # Adjacency list
+        self.graph = defaultdict(list)  # Adjacency list of edges not yet in the CSR arrays
+        self.indptr = array('i', [0] * (self.vertices + 1))  # CSR row offsets
+        self.indices = array('i')  # CSR neighbor vertices
+        self.sources = array('i')  # Source vertex of each entry in indices
+        self.vertex_to_scc = None  # SCC index of each vertex, set by _label_sccs
+        self._sccs = None  # Last SCC list returned, which vertex_to_scc describes
     
     def add_edge(self, from_airport, to_airport):
         """
@@ -21,62 +31,140 @@ class Graph:
         Args:
             from_airport (str): The starting airport code.
             to_airport (str): The destination airport code.
+
+        Raises:
+            TypeError: If an index is not an integer.
+            ValueError: If an index is outside 0..vertices-1.
         """
+        from_airport, to_airport = self._check_route(from_airport, to_airport)
         self.graph[from_airport].append(to_airport)
     
+    def _check_route(self, from_airport, to_airport):
+        """
+        Validate that both ends of a route are vertex indices of this graph.
+
+        Args:
+            from_airport (int): The starting airport index.
+            to_airport (int): The destination airport index.
+
+        Returns:
+            tuple: The route as a pair of plain ints.
+
+        Raises:
+            TypeError: If an index is not an integer.
+            ValueError: If an index is outside 0..vertices-1.
+        """
+        from_airport, to_airport = index(from_airport), index(to_airport)
+        if not (0 <= from_airport < self.vertices and 0 <= to_airport < self.vertices):
+            raise ValueError(
+                f"Route ({from_airport}, {to_airport}) has an index outside 0..{self.vertices - 1}"
+            )
+        return from_airport, to_airport
+    
     def add_routes(self, routes):
         """
         Add multiple directed routes (bulk routes) to the graph.
 
+        All codes are resolved before any route is added, so an unknown code
+        leaves the graph unchanged. Callers that already hold vertex indices
+        can use add_routes_int and skip the code lookups.
+
         Args:
             routes (list of tuple): A list of tuples where each tuple 
                                     contains a pair of airport codes (from, to).
+
+        Raises:
+            KeyError: If an airport code is not in the airports dictionary.
         """
-        for from_airport, to_airport in routes:
-            self.add_edge(self.airports[from_airport], self.airports[to_airport])  # Use airport dict to get vertex index
+        lookup = self.airports.__getitem__  # Use airport dict to get vertex index
+        batch = [(lookup(from_airport), lookup(to_airport)) for from_airport, to_airport in routes]
+        self.add_routes_int(batch)
     
-    def _depth_first_search(self, vertex, visited, stack):
+    def add_routes_int(self, routes):
         """
-        Perform a depth-first search to determine the finish order of vertices.
+        Add multiple directed routes given as vertex indices instead of airport codes.
+
+        The whole batch is validated before any route is added, so on error
+        the graph is left unchanged.
 
         Args:
-            vertex (int): The current vertex index.
-            visited (list): A list to track visited vertices.
-            stack (list): A stack to store the finish order of vertices.
-        """
-        visited[vertex] = True
-        for neighbor in self.graph[vertex]:
-            if not visited[neighbor]:
-                self._depth_first_search(neighbor, visited, stack)
-        stack.append(vertex)
+            routes (iterable of tuple): Pairs of airport indices (from, to).
+
+        Raises:
+            TypeError: If an index is not an integer.
+            ValueError: If an index is outside 0..vertices-1.
+        """
+        vertices = self.vertices
+        batch = [(index(from_airport), index(to_airport)) for from_airport, to_airport in routes]
+        for from_airport, to_airport in batch:
+            if not (0 <= from_airport < vertices and 0 <= to_airport < vertices):
+                self._check_route(from_airport, to_airport)  # Raises with the offending route
+
+        graph = self.graph
+        for from_airport, to_airport in batch:
+            graph[from_airport].append(to_airport)
     
-    def _transpose_graph(self):
+    def _finalize(self):
         """
-        Reverse the graph (transpose).
+        Merge the pending adjacency list into the CSR arrays.
 
-        Returns:
-            Graph: A new graph instance representing the transposed graph.
+        Called lazily by the queries, so routes added in many batches are
+        merged in one rebuild rather than one rebuild per batch. The
+        neighbors of vertex v are stored contiguously in
+        indices[indptr[v]:indptr[v + 1]], and sources holds the matching
+        source vertex of every edge. Once merged, the adjacency list is
+        emptied so its dict and list overhead can be freed. Pending edges
+        are already range-checked by add_edge and add_routes_int.
         """
-        transposed_graph = Graph(self.airports)  # Pass the airports dict
-        for from_airport in self.graph:
-            for to_airport in self.graph[from_airport]:
-                transposed_graph.add_edge(to_airport, from_airport)
-        return transposed_graph
+        pending = self.graph
+        if not pending:
+            return
+
+        vertices = self.vertices
+        indptr, indices = self.indptr, self.indices
+
+        # Count the out-degree of every vertex
+        degrees = list(map(sub, indptr[1:], indptr[:-1]))
+        for vertex, neighbors in pending.items():
+            degrees[vertex] += len(neighbors)
+
+        # Prefix-sum the degrees into row offsets
+        new_indptr = array('i', accumulate(degrees, initial=0))
+
+        # Fill each row with existing neighbors followed by pending ones
+        empty = ()
+        pending_rows = map(pending.get, range(vertices), repeat(empty))
+        if indices:
+            rows = chain.from_iterable(
+                (indices[indptr[v]:indptr[v + 1]], row) for v, row in enumerate(pending_rows)
+            )
+        else:
+            rows = pending_rows
+        new_indices = array('i', chain.from_iterable(rows))
+
+        # Repeat each source vertex once per outgoing edge
+        new_sources = array('i', chain.from_iterable(map(repeat, range(vertices), degrees)))
+
+        self.indptr, self.indices, self.sources = new_indptr, new_indices, new_sources
+        self.graph = defaultdict(list)
     
-    def _depth_first_search_transposed(self, vertex, visited, component):
+    def _label_sccs(self):
         """
-        Perform a depth-first search on the transposed graph to find strongly connected components.
+        Label every vertex with the index of its strongly connected component.
 
-        Args:
-            vertex (int): The current vertex index.
-            visited (list): A list to track visited vertices.
-            component (list): A list to store the current strongly connected component.
-        """
-        visited[vertex] = True
-        component.append(vertex)
-        for neighbor in self.graph[vertex]:
-            if not visited[neighbor]:
-                self._depth_first_search_transposed(neighbor, visited, component)
+        The search itself runs in the Tarjan kernel over the CSR arrays; see
+        _tarjan_numba.tarjan_scc. The kernel is compiled when Numba is
+        available and otherwise runs as plain Python. The SCC index of each
+        vertex is cached in self.vertex_to_scc.
+
+        Returns:
+            int: The number of strongly connected components.
+        """
+        self._finalize()
+        scc_id, num_sccs = tarjan_scc(self.indptr, self.indices, self.vertices)
+        self.vertex_to_scc = scc_id
+        self._sccs = None
+        return num_sccs
     
     def find_strongly_connected_components(self):
         """
@@ -86,29 +174,14 @@ class Graph:
             list: A list of strongly connected components, where each component 
                   is represented as a list of vertices (airport indices).
         """
-        stack = []
-        visited = [False] * self.vertices
-        
-        # First DFS pass to fill the stack with finish times
-        for i in range(self.vertices):
-            if not visited[i]:
-                self._depth_first_search(i, visited, stack)
-        
-        # Get the transposed graph
-        transposed_graph = self._transpose_graph()
-        
-        # Reset visited array for the second pass
-        visited = [False] * self.vertices
-        sccs = []  # List of all SCCs
-        
-        # Process all vertices in the order of decreasing finish times
-        while stack:
-            vertex = stack.pop()
-            if not visited[vertex]:
-                component = []
-                transposed_graph._depth_first_search_transposed(vertex, visited, component)
-                sccs.append(component)
-        
+        num_sccs = self._label_sccs()
+        scc_id = self.vertex_to_scc
+
+        sccs = [[] for _ in range(num_sccs)]  # List of all SCCs
+        for vertex in range(self.vertices):
+            sccs[scc_id[vertex]].append(vertex)
+
+        self._sccs = sccs
         return sccs
     
     def build_compressed_graph_from_sccs(self, sccs):
@@ -122,50 +195,114 @@ class Graph:
             defaultdict: A dictionary representing the compressed graph,
                          where keys are SCC indices and values are sets of connected SCC indices.
         """
-        scc_map = {}
-        for idx, scc in enumerate(sccs):
-            for airport in scc:
-                scc_map[airport] = idx
+        if sccs is self._sccs:
+            scc_id = self.vertex_to_scc  # Already computed along with sccs
+        else:
+            scc_id = [0] * self.vertices  # SCC index of each vertex
+            for idx, scc in enumerate(sccs):
+                for airport in scc:
+                    scc_id[airport] = idx
         
         compressed_graph = defaultdict(set)
         
-        for from_airport in self.graph:
-            for to_airport in self.graph[from_airport]:
-                if scc_map[from_airport] != scc_map[to_airport]:  # Only add routes between different SCCs
-                    compressed_graph[scc_map[from_airport]].add(scc_map[to_airport])
+        self._finalize()
+        indptr, indices = self.indptr, self.indices
+        lookup = scc_id.__getitem__
+        for from_airport in range(self.vertices):
+            u = scc_id[from_airport]
+            row = indices[indptr[from_airport]:indptr[from_airport + 1]]
+            targets = {v for v in map(lookup, row) if v != u}  # Only add routes between different SCCs
+            if targets:
+                compressed_graph[u] |= targets
         
         return compressed_graph
     
-    def calculate_routes_needed(self, compressed_graph, start_scc):
+    def _compressed_edges(self, scc_id):
+        """
+        Collect the distinct edges between different SCCs.
+
+        Each edge is packed into a single int as (u << 32) | v and collected
+        in one set, instead of a defaultdict(set) with one .add per edge. The
+        scc_id lookups go through map; the packing and the u != v filter
+        still run as Python bytecode for every edge.
+
+        Args:
+            scc_id (array): The SCC index of each vertex.
+
+        Returns:
+            set: The packed (from SCC, to SCC) pairs of the compressed graph.
+        """
+        self._finalize()
+        lookup = scc_id.__getitem__
+        return {
+            u << 32 | v
+            for u, v in zip(map(lookup, self.sources), map(lookup, self.indices))
+            if u != v  # Only keep routes between different SCCs
+        }
+    
+    @staticmethod
+    def _compressed_targets(pairs):
+        """
+        Extract the destination SCC of every packed compressed edge.
+
+        Only destinations are needed for reachability from one airport. Making
+        the whole graph strongly connected would instead need
+        max(sources, sinks) routes, with sinks found from the origins
+        (pair >> 32) of the same packed edges.
+
+        Args:
+            pairs (set): Packed (from SCC, to SCC) pairs from _compressed_edges.
+
+        Returns:
+            iterator: The destination SCC index of each pair.
+        """
+        return map(and_, pairs, repeat(0xffffffff))
+    
+    @staticmethod
+    def _count_zero_in_degree(targets, start_scc, num_sccs):
+        """
+        Count the SCCs with in-degree 0, excluding the starting SCC.
+
+        An SCC has in-degree 0 exactly when no compressed edge points to it,
+        so the distinct targets are enough and no per-SCC counts are kept.
+
+        Args:
+            targets (iterable): The destination SCC of every compressed edge.
+            start_scc (int): The index of the starting strongly connected component.
+            num_sccs (int): The number of strongly connected components.
+
+        Returns:
+            int: The number of SCCs with in-degree 0 other than start_scc.
+        """
+        targeted = set(targets)
+        return num_sccs - len(targeted) - (start_scc not in targeted)
+    
+    def calculate_routes_needed(self, compressed_graph, start_scc, num_sccs):
         """
         Calculate the number of additional routes needed to connect the graph.
 
         Args:
             compressed_graph (defaultdict): The compressed graph representation.
             start_scc (int): The index of the starting strongly connected component.
+            num_sccs (int): The number of strongly connected components.
 
         Returns:
             int: The number of additional routes needed.
         """
-        in_degree = defaultdict(int)
-
-        # Calculate in-degrees
-        for u in compressed_graph:
-            for v in compressed_graph[u]:
-                in_degree[v] += 1
-
         # Count nodes with in-degree = 0 excluding the start_scc
-        zero_in_degree_count = 0
-        for node in range(len(compressed_graph)):
-            if node != start_scc and in_degree[node] == 0:
-                zero_in_degree_count += 1
-
-        return zero_in_degree_count
+        targets = chain.from_iterable(compressed_graph.values())
+        return self._count_zero_in_degree(targets, start_scc, num_sccs)
 
     def find_minimum_additional_routes(self, start_airport):
         """
         Find the minimum number of additional routes needed from a given airport.
 
+        The goal is for every airport to be reachable from start_airport, not
+        full strong connectivity. Each SCC with in-degree 0 in the compressed
+        graph, other than the starting SCC, can only be reached through a new
+        route. One route into each such SCC is enough, because every other
+        SCC is reachable from some source SCC.
+
         Args:
             start_airport (str): The airport code to start from.
 
@@ -173,15 +310,16 @@ class Graph:
             int: The minimum number of additional routes needed to connect the graph.
         """
         # Step 1: Find Strongly Connected Components (SCCs)
-        sccs = self.find_strongly_connected_components()
+        num_sccs = self._label_sccs()
         
-        # Step 2: Build compressed graph from SCCs
-        compressed_graph = self.build_compressed_graph_from_sccs(sccs)
+        # Step 2: Collect the deduplicated edges of the compressed graph
+        pairs = self._compressed_edges(self.vertex_to_scc)
         
         # Step 3: Determine the starting SCC
-        start_scc = next(i for i, scc in enumerate(sccs) if self.airports[start_airport] in scc)
+        start_scc = self.vertex_to_scc[self.airports[start_airport]]
         
         # Step 4: Calculate additional routes needed
-        additional_routes_needed = self.calculate_routes_needed(compressed_graph, start_scc)
+        targets = self._compressed_targets(pairs)
+        additional_routes_needed = self._count_zero_in_degree(targets, start_scc, num_sccs)
         
         return additional_routes_needed
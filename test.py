@@ -28,3 +28,14 @@ additional_routes_needed = graph.find_minimum_additional_routes(start_airport)
 print(f"Minimum number of additional routes needed from {start_airport}: {additional_routes_needed}")
 
 
+
+# Regression check: a source SCC with no outgoing routes must still be counted
+check_graph = Graph({i: i for i in range(6)})
+check_graph.add_routes_int([(4, 2), (3, 0), (4, 3), (2, 4)])
+assert check_graph.find_minimum_additional_routes(0) == 3
+
+# The public compressed graph path must give the same answer
+sccs = check_graph.find_strongly_connected_components()
+compressed_graph = check_graph.build_compressed_graph_from_sccs(sccs)
+start_scc = check_graph.vertex_to_scc[0]
+assert check_graph.calculate_routes_needed(compressed_graph, start_scc, len(sccs)) == 3